@@ -4,11 +4,18 @@
 Boots QEMU headlessly with serial console, logs in, runs commands, and
 verifies output. No external dependencies — stdlib only.
 
+Test groups run on parallel QEMU instances, up to one per test group
+(FORNAX_TEST_JOBS, default: CPU count); set FORNAX_TEST_JOBS=1 to run
+everything on a single instance.
+FORNAX_HTTP_DEBUG=1 logs each request to the test package server.
+
 Usage:
     python3 scripts/test-integration.py
     make test
 """
 
+import concurrent.futures
+import errno
 import gzip
 import hashlib
 import http.server
@@ -17,7 +24,9 @@ import json
 import os
 import re
 import select
+import shutil
 import signal
+import stat
 import subprocess
 import sys
 import tarfile
@@ -67,23 +76,51 @@ OVMF_CANDIDATES = [
 
 def find_ovmf():
     for path in OVMF_CANDIDATES:
-        if os.path.isfile(path):
-            return path
+        try:
+            if stat.S_ISREG(os.stat(path).st_mode):
+                return path
+        except OSError:
+            pass
     return None
 
 
 # ── QemuDriver ───────────────────────────────────────────────────────
 
+# Bytes of already-scanned output re-searched when new data arrives, so a
+# match straddling two reads is still found. Longer than any test pattern.
+EXPECT_OVERLAP = 256
+
+# full_log keeps the tail of the serial output for the failure dump: once it
+# passes FULL_LOG_MAX bytes, everything but the last FULL_LOG_KEEP is dropped
+FULL_LOG_MAX = 16 * 1024 * 1024
+FULL_LOG_KEEP = 8 * 1024 * 1024
+
+# Live serial echo is batched: flushed every 64 KB or 0.25 s, whichever first
+LIVE_OUTPUT = sys.stderr.isatty()
+ECHO_FLUSH_BYTES = 64 * 1024
+ECHO_FLUSH_SECS = 0.25
+
+
 class QemuDriver:
-    def __init__(self, ovmf, esp_dir, disk_img):
+    def __init__(self, ovmf, esp_dir, disk_img, echo=True):
         self.ovmf = ovmf
         self.esp_dir = esp_dir
         self.disk_img = disk_img
+        # Copy serial output to stderr: only on a terminal, and not when
+        # instances run in parallel. full_log keeps everything regardless.
+        self.echo = echo and LIVE_OUTPUT
+        self._echo_buf = bytearray()
+        self._echo_flushed = 0.0
         self.proc = None
-        self.buf = b""
-        self.full_log = b""
+        self.stopped = False
+        self._poller = None
+        self.buf = bytearray()
+        self.full_log = bytearray()
+        self.scan_start = 0
 
     def start(self):
+        if self.stopped:
+            raise RuntimeError("QEMU was stopped")
         # Try KVM first (hardware virt), fall back to TCG single-threaded.
         # TCG multi-threaded can starve the QEMU event loop during
         # tight poll loops in the guest, causing virtio-blk timeouts.
@@ -113,84 +150,164 @@ class QemuDriver:
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
         )
+        if self.stopped:
+            # stop() ran while Popen was starting and saw no process to kill
+            self.proc.kill()
+            self.proc.wait()
+            raise RuntimeError("QEMU was stopped")
         # Set stdout to non-blocking
         import fcntl
         fd = self.proc.stdout.fileno()
         flags = fcntl.fcntl(fd, fcntl.F_GETFL)
         fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        # Linux: grow the pipe from 64 KB to 1 MB so boot-time bursts don't
+        # stall QEMU on a full pipe and get drained in fewer reads
+        if sys.platform.startswith("linux"):
+            try:
+                fcntl.fcntl(fd, getattr(fcntl, "F_SETPIPE_SZ", 1031), 1 << 20)
+            except OSError:
+                pass  # above /proc/sys/fs/pipe-max-size; keep the default
+        self._poller = select.poll()
+        self._poller.register(fd, select.POLLIN)
 
     def _read_available(self):
         """Read all currently available data from stdout."""
         fd = self.proc.stdout.fileno()
-        data = b""
+        chunks = []
         while True:
-            ready, _, _ = select.select([fd], [], [], 0)
-            if not ready:
-                break
+            # stdout is O_NONBLOCK, so an empty pipe raises instead of blocking
             try:
-                chunk = os.read(fd, 4096)
-                if not chunk:
-                    break
-                data += chunk
+                chunk = os.read(fd, 65536)
             except BlockingIOError:
                 break
-        return data
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
 
     def expect(self, pattern, timeout=30):
-        """Wait for regex pattern to match in accumulated output.
+        """Wait for regex pattern (str, bytes or compiled) to match in output.
 
         Returns the match object. Raises TimeoutError if not found within
         timeout seconds.
         """
-        deadline = time.monotonic() + timeout
-        compiled = re.compile(pattern.encode() if isinstance(pattern, str) else pattern)
+        if isinstance(pattern, re.Pattern):
+            compiled = pattern
+        else:
+            compiled = re.compile(pattern.encode() if isinstance(pattern, str) else pattern)
 
-        while True:
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                # Dump recent buffer for debugging
-                recent = self.buf[-500:] if len(self.buf) > 500 else self.buf
-                raise TimeoutError(
-                    f"Timed out waiting for {pattern!r}\n"
-                    f"Last output:\n{recent.decode(errors='replace')}"
-                )
-
-            fd = self.proc.stdout.fileno()
-            ready, _, _ = select.select([fd], [], [], min(remaining, 0.5))
-
-            if ready:
-                try:
-                    chunk = os.read(fd, 4096)
-                    if chunk:
-                        self.buf += chunk
-                        self.full_log += chunk
-                        # Print to stderr for live monitoring
-                        sys.stderr.buffer.write(chunk)
-                        sys.stderr.buffer.flush()
-                except BlockingIOError:
-                    pass
-
-            # Check for match
-            m = compiled.search(self.buf)
+        def search(start):
+            m = compiled.search(self.buf, start)
             if m:
-                # Trim buffer up to end of match to avoid re-matching
+                # Trim buffer up to end of match to avoid re-matching. Rebind
+                # rather than del in place: m.group() reads the old buffer.
                 self.buf = self.buf[m.end():]
-                return m
+            return m
+
+        return self._wait_for(search, compiled.pattern, timeout)
+
+    def expect_literal(self, needle, timeout=30):
+        """Wait for an exact byte string in accumulated output.
+
+        Like expect(), but a plain substring search with no regex engine.
+        Returns the matched bytes (needle). Raises TimeoutError if not found
+        within timeout seconds.
+        """
+        if isinstance(needle, str):
+            needle = needle.encode()
+
+        def search(start):
+            i = self.buf.find(needle, start)
+            if i < 0:
+                return None
+            self.buf = self.buf[i + len(needle):]
+            return needle
+
+        return self._wait_for(search, needle, timeout)
 
-            # Check if QEMU died
-            if self.proc.poll() is not None:
-                raise RuntimeError(
-                    f"QEMU exited unexpectedly (code {self.proc.returncode})"
-                )
+    def _wait_for(self, search, what, timeout):
+        """Read output until search(start) returns a non-None result.
+
+        The whole buffer is searched once; after that only the newly read
+        tail (plus EXPECT_OVERLAP bytes) is rescanned on each read.
+        """
+        deadline = time.monotonic() + timeout
+        self.scan_start = 0
+
+        try:
+            while True:
+                # Check for match
+                result = search(self.scan_start)
+                if result is not None:
+                    self.scan_start = 0
+                    return result
+                self.scan_start = max(0, len(self.buf) - EXPECT_OVERLAP)
+
+                # Check if QEMU died. Drain what it wrote before exiting
+                # first: a panic message must still match and reach full_log.
+                if self.proc.poll() is not None:
+                    self._consume(self._read_available())
+                    result = search(self.scan_start)
+                    if result is not None:
+                        self.scan_start = 0
+                        return result
+                    if self.stopped:
+                        raise RuntimeError("QEMU was stopped")
+                    raise RuntimeError(
+                        f"QEMU exited unexpectedly (code {self.proc.returncode})"
+                    )
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Dump recent buffer for debugging
+                    recent = self.buf[-500:] if len(self.buf) > 500 else self.buf
+                    raise TimeoutError(
+                        f"Timed out waiting for {what!r}\n"
+                        f"Last output:\n{recent.decode(errors='replace')}"
+                    )
+
+                if self._poller.poll(min(remaining, 0.5) * 1000):
+                    self._consume(self._read_available())
+                else:
+                    # Output went quiet; show whatever is still held back
+                    self._flush_echo()
+        finally:
+            self._flush_echo()
+
+    def _consume(self, chunk):
+        """Append freshly read output to buf and full_log, echoing it."""
+        if not chunk:
+            return
+        self.buf.extend(chunk)
+        self.full_log.extend(chunk)
+        if len(self.full_log) > FULL_LOG_MAX:
+            del self.full_log[:-FULL_LOG_KEEP]
+        if self.echo:
+            self._echo(chunk)
+
+    def _echo(self, chunk):
+        """Copy serial output to stderr for live monitoring, in batches."""
+        self._echo_buf += chunk
+        if (len(self._echo_buf) >= ECHO_FLUSH_BYTES
+                or time.monotonic() - self._echo_flushed >= ECHO_FLUSH_SECS):
+            self._flush_echo()
+
+    def _flush_echo(self):
+        if self._echo_buf:
+            sys.stderr.buffer.write(self._echo_buf)
+            sys.stderr.buffer.flush()
+            self._echo_buf.clear()
+        self._echo_flushed = time.monotonic()
 
     _cmd_seq = 0
 
     def send_line(self, text):
         """Send text + carriage return to serial console."""
-        self.proc.stdin.write((text + "\r").encode())
-        self.proc.stdin.flush()
-        # Small delay so the OS has time to echo
-        time.sleep(0.1)
+        try:
+            self.proc.stdin.write((text + "\r").encode())
+            self.proc.stdin.flush()
+        except BrokenPipeError:
+            raise RuntimeError("QEMU is not reading input (exited?)") from None
 
     def send_cmd(self, cmd, timeout=15):
         """Send a shell command and wait for completion using a unique marker.
@@ -199,22 +316,31 @@ class QemuDriver:
         to appear on its own line in the output. This avoids false-positive
         matches against kernel debug messages or shell echo artifacts.
         """
-        QemuDriver._cmd_seq += 1
-        marker = f"__D{QemuDriver._cmd_seq}__"
+        self._cmd_seq += 1
+        marker = f"__D{self._cmd_seq}__"
         self.send_line(f"{cmd}; echo {marker}")
-        self.expect(rf"\n{marker}", timeout=timeout)
+        self.expect_literal(f"\n{marker}", timeout=timeout)
 
     def stop(self):
-        """Stop QEMU gracefully, then force-kill if needed."""
-        if self.proc is None:
+        """Stop QEMU gracefully, then force-kill if needed.
+
+        May be called from another thread while a test is still driving this
+        instance. self.proc is left in place, so that test sees QEMU exit and
+        fails with RuntimeError instead of tripping over a missing process.
+        Called before start() has spawned QEMU, it makes start() bail out.
+        """
+        # Set the flag before reading proc: start() checks it after Popen
+        already_stopped = self.stopped
+        self.stopped = True
+        proc = self.proc
+        if proc is None or already_stopped:
             return
         try:
-            self.proc.send_signal(signal.SIGTERM)
-            self.proc.wait(timeout=5)
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=5)
         except subprocess.TimeoutExpired:
-            self.proc.kill()
-            self.proc.wait()
-        self.proc = None
+            proc.kill()
+            proc.wait()
 
     def wait_exit(self, timeout=10):
         """Wait for QEMU to exit on its own."""
@@ -228,6 +354,26 @@ class QemuDriver:
 
 # ── Package builder ──────────────────────────────────────────────────
 
+class HashingWriter:
+    """Write-only file wrapper that SHA-256 hashes everything written.
+
+    SHA-256 is fixed by fay, which checks the repo.json digest on the guest;
+    a faster local-only hash (e.g. BLAKE3) would need a matching guest change
+    and a non-stdlib dependency here.
+    """
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.fp.write(data)
+
+    def flush(self):
+        self.fp.flush()
+
+
 def build_xxd_package(xxd_binary_path, pkg_dir):
     """Create xxd-1.0.0-1.tar.gz with .PKGINFO and bin/xxd."""
     pkg_name = "xxd"
@@ -242,32 +388,28 @@ def build_xxd_package(xxd_binary_path, pkg_dir):
         "depends": [],
     }).encode()
 
-    with tarfile.open(tarball_path, "w:gz", format=tarfile.USTAR_FORMAT) as tf:
-        # .PKGINFO
-        info = tarfile.TarInfo(name=".PKGINFO")
-        info.size = len(pkginfo)
-        info.type = tarfile.REGTYPE
-        tf.addfile(info, io.BytesIO(pkginfo))
-
-        # bin/ directory
-        dir_info = tarfile.TarInfo(name="bin/")
-        dir_info.type = tarfile.DIRTYPE
-        dir_info.mode = 0o755
-        tf.addfile(dir_info)
-
-        # bin/xxd
-        tf.add(xxd_binary_path, arcname="bin/xxd")
-
-    # Compute SHA-256
-    sha256 = hashlib.sha256()
-    with open(tarball_path, "rb") as f:
-        while True:
-            chunk = f.read(8192)
-            if not chunk:
-                break
-            sha256.update(chunk)
+    # SHA-256 is computed as the gzip stream is written, so the tarball is
+    # never read back. Level 1: it only travels over localhost.
+    with open(tarball_path, "wb") as raw:
+        writer = HashingWriter(raw)
+        with gzip.GzipFile(tarball_path, "wb", compresslevel=1, fileobj=writer) as gz, \
+                tarfile.open(fileobj=gz, mode="w", format=tarfile.USTAR_FORMAT) as tf:
+            # .PKGINFO
+            info = tarfile.TarInfo(name=".PKGINFO")
+            info.size = len(pkginfo)
+            info.type = tarfile.REGTYPE
+            tf.addfile(info, io.BytesIO(pkginfo))
+
+            # bin/ directory
+            dir_info = tarfile.TarInfo(name="bin/")
+            dir_info.type = tarfile.DIRTYPE
+            dir_info.mode = 0o755
+            tf.addfile(dir_info)
 
-    return tarball_name, sha256.hexdigest()
+            # bin/xxd
+            tf.add(xxd_binary_path, arcname="bin/xxd")
+
+    return tarball_name, writer.sha256.hexdigest()
 
 
 def generate_repo_json(pkg_dir, tarball_name, sha256_hex):
@@ -291,7 +433,16 @@ def generate_repo_json(pkg_dir, tarball_name, sha256_hex):
 
 # ── HTTP server ──────────────────────────────────────────────────────
 
+# Set FORNAX_HTTP_DEBUG=1 to log every request the guest makes
+HTTP_DEBUG = bool(os.environ.get("FORNAX_HTTP_DEBUG"))
+
+
 class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_request(self, code="-", size="-"):
+        # Errors still go through log_error -> log_message
+        if HTTP_DEBUG:
+            super().log_request(code, size)
+
     def log_message(self, fmt, *args):
         log("HTTP", fmt % args, YELLOW)
 
@@ -308,18 +459,35 @@ def start_http_server(directory, port=8000):
 
 # ── Disk image builder ───────────────────────────────────────────────
 
+# posix_fallocate errnos meaning "not supported here" rather than a real failure
+FALLOCATE_UNSUPPORTED = {errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS}
+
+
 def create_test_disk(tmpdir, rootfs_dir, disk_size_mb=256):
     """Create a fresh test disk image with GPT + fxfs."""
     disk_img = os.path.join(tmpdir, "test-disk.img")
     mkgpt = os.path.join(PROJECT_DIR, "zig-out", "bin", "mkgpt")
     mkfxfs = os.path.join(PROJECT_DIR, "zig-out", "bin", "mkfxfs")
 
-    # Create blank disk (non-sparse, fully allocated)
+    # Create blank disk (fully allocated where supported, sparse otherwise)
     log("DISK", f"Creating {disk_size_mb} MB test disk...")
-    with open(disk_img, "wb") as f:
-        chunk = b"\0" * (1024 * 1024)
-        for _ in range(disk_size_mb):
-            f.write(chunk)
+    disk_bytes = disk_size_mb * 1024 * 1024
+    fd = os.open(disk_img, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        try:
+            # Linux: one syscall, no zeroes copied through userspace
+            os.posix_fallocate(fd, 0, disk_bytes)
+        except (AttributeError, OSError) as e:
+            # Fall back to a sparse file only where fallocate is unsupported:
+            # macOS has no posix_fallocate, and some filesystems (e.g. ZFS on
+            # FreeBSD) return EINVAL. mkgpt and mkfxfs overwrite what they
+            # need. Real failures (ENOSPC, EFBIG, EIO, ...) are re-raised so
+            # they show up here, not later as guest virtio-blk write errors.
+            if isinstance(e, OSError) and e.errno not in FALLOCATE_UNSUPPORTED:
+                raise
+            os.ftruncate(fd, disk_bytes)
+    finally:
+        os.close(fd)
 
     # GPT partition table
     log("DISK", "Creating GPT partition table...")
@@ -361,12 +529,27 @@ def prepare_rootfs(rootfs_dir):
 
 # ── Tests ────────────────────────────────────────────────────────────
 
+# Regex patterns used by the tests, compiled once at import. Plain strings
+# go through expect_literal() instead.
+RE_PROMPT = re.compile(rb"root@fornax[#$] ")
+RE_TIME = re.compile(rb"(\d+) (\d+)")
+RE_DATE = re.compile(
+    rb"(Sun|Mon|Tue|Wed|Thu|Fri|Sat)\s+"
+    rb"(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)"
+)
+RE_NUMBER = re.compile(rb"(\d+)")
+RE_ISO_DATE = re.compile(rb"\d{4}-\d{2}-\d{2}")
+RE_UPTIME = re.compile(rb"\d+[hm]")
+RE_DOWNLOADED = re.compile(rb"downloaded \d+ bytes")
+RE_1024 = re.compile(rb"\b1024\b")
+
+
 def test_boot_login(qemu):
     """Wait for login prompt, log in as root."""
     try:
-        qemu.expect(r"fornax login:", timeout=90)
+        qemu.expect_literal("fornax login:", timeout=90)
         qemu.send_line("root")
-        qemu.expect(r"root@fornax", timeout=10)
+        qemu.expect_literal("root@fornax", timeout=10)
         log_pass("test_boot_login")
         return True
     except (TimeoutError, RuntimeError) as e:
@@ -384,8 +567,8 @@ def test_basic_commands(qemu):
         # Test an external command that reads from fxfs
         qemu.send_cmd("echo testdata_Z9 > /tmp/basic.txt")
         qemu.send_line("cat /tmp/basic.txt; echo __CAT_BASIC__")
-        qemu.expect(r"testdata_Z9", timeout=30)
-        qemu.expect(r"__CAT_BASIC__", timeout=5)
+        qemu.expect_literal("testdata_Z9", timeout=30)
+        qemu.expect_literal("__CAT_BASIC__", timeout=5)
 
         log_pass("test_basic_commands")
         return True
@@ -400,10 +583,10 @@ def test_time_subsystem(qemu):
         # 1. /dev/time format: "<epoch> <uptime>\n"
         #    Epoch should be >1700000000 (2023+) if RTC works.
         qemu.send_line("cat /dev/time; echo __TIME_DONE__")
-        m = qemu.expect(r"(\d+) (\d+)", timeout=10)
+        m = qemu.expect(RE_TIME, timeout=10)
         epoch = int(m.group(1))
         uptime = int(m.group(2))
-        qemu.expect(r"__TIME_DONE__", timeout=5)
+        qemu.expect_literal("__TIME_DONE__", timeout=5)
 
         if epoch < 1700000000:
             log_fail("test_time_subsystem", f"epoch too low: {epoch}")
@@ -414,32 +597,32 @@ def test_time_subsystem(qemu):
 
         # 2. date command: should output day-of-week + month + year
         qemu.send_line("date; echo __DATE_DONE__")
-        m = qemu.expect(r"(Sun|Mon|Tue|Wed|Thu|Fri|Sat)\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)", timeout=10)
-        qemu.expect(r"__DATE_DONE__", timeout=5)
+        m = qemu.expect(RE_DATE, timeout=10)
+        qemu.expect_literal("__DATE_DONE__", timeout=5)
 
         # 3. date +%s: should match /dev/time epoch (within a few seconds)
         qemu.send_line("date +%s; echo __EPOCH_DONE__")
-        m = qemu.expect(r"(\d+)", timeout=10)
+        m = qemu.expect(RE_NUMBER, timeout=10)
         cmd_epoch = int(m.group(1))
-        qemu.expect(r"__EPOCH_DONE__", timeout=5)
+        qemu.expect_literal("__EPOCH_DONE__", timeout=5)
         if abs(cmd_epoch - epoch) > 30:
             log_fail("test_time_subsystem", f"date +%s ({cmd_epoch}) too far from /dev/time ({epoch})")
             return False
 
         # 4. date -I: ISO 8601 format YYYY-MM-DD
         qemu.send_line("date -I; echo __ISO_DONE__")
-        qemu.expect(r"\d{4}-\d{2}-\d{2}", timeout=10)
-        qemu.expect(r"__ISO_DONE__", timeout=5)
+        qemu.expect(RE_ISO_DATE, timeout=10)
+        qemu.expect_literal("__ISO_DONE__", timeout=5)
 
         # 5. uptime command
         qemu.send_line("uptime; echo __UP_DONE__")
-        qemu.expect(r"\d+[hm]", timeout=10)
-        qemu.expect(r"__UP_DONE__", timeout=5)
+        qemu.expect(RE_UPTIME, timeout=10)
+        qemu.expect_literal("__UP_DONE__", timeout=5)
 
         # 6. crontab -l (crond should be running)
         qemu.send_line("crontab -l; echo __CRON_DONE__")
         # Should succeed (either "no jobs" or list of jobs)
-        qemu.expect(r"__CRON_DONE__", timeout=10)
+        qemu.expect_literal("__CRON_DONE__", timeout=10)
 
         log_pass("test_time_subsystem")
         return True
@@ -453,19 +636,18 @@ def test_fay_install_xxd(qemu):
     try:
         # Sync package database
         qemu.send_line("fay sync")
-        qemu.expect(r"downloaded \d+ bytes", timeout=30)
-        qemu.expect(r"root@fornax[#$] ", timeout=10)
+        qemu.expect(RE_DOWNLOADED, timeout=30)
+        qemu.expect(RE_PROMPT, timeout=10)
 
         # Install xxd
         qemu.send_line("fay install xxd")
-        qemu.expect(r"xxd 1\.0\.0-1 installed", timeout=60)
-        qemu.expect(r"root@fornax[#$] ", timeout=10)
+        qemu.expect_literal("xxd 1.0.0-1 installed", timeout=60)
+        qemu.expect(RE_PROMPT, timeout=10)
 
         # Test xxd works: write a file, then xxd it
-        qemu.send_cmd("echo hello > /tmp/xxd_test.txt")
-        qemu.send_line("xxd /tmp/xxd_test.txt; echo __XXD_DONE__")
-        qemu.expect(r"00000000", timeout=30)
-        qemu.expect(r"__XXD_DONE__", timeout=5)
+        qemu.send_line("echo hello > /tmp/xxd_test.txt; xxd /tmp/xxd_test.txt; echo __XXD_DONE__")
+        qemu.expect_literal("00000000", timeout=30)
+        qemu.expect_literal("__XXD_DONE__", timeout=5)
 
         log_pass("test_fay_install_xxd")
         return True
@@ -483,52 +665,53 @@ def test_filesystem(qemu):
         # 2. Small file: write and read back via cat
         qemu.send_cmd("echo 'fs_hello_world' > /tmp/fstest/small.txt")
         qemu.send_line("cat /tmp/fstest/small.txt; echo __CAT1__")
-        qemu.expect(r"fs_hello_world", timeout=10)
-        qemu.expect(r"__CAT1__", timeout=5)
+        qemu.expect_literal("fs_hello_world", timeout=10)
+        qemu.expect_literal("__CAT1__", timeout=5)
 
         # 3. Use dd to create a 64KB file from /dev/zero, check size with wc -c
         qemu.send_cmd("dd if=/dev/zero of=/tmp/fstest/medium.bin bs=4096 count=16")
         qemu.send_line("wc -c /tmp/fstest/medium.bin; echo __WC1__")
-        qemu.expect(r"65536", timeout=10)
-        qemu.expect(r"__WC1__", timeout=5)
+        qemu.expect_literal("65536", timeout=10)
+        qemu.expect_literal("__WC1__", timeout=5)
 
         # 4. Larger file: 256KB
         qemu.send_cmd("dd if=/dev/zero of=/tmp/fstest/large.bin bs=4096 count=64", timeout=20)
         qemu.send_line("wc -c /tmp/fstest/large.bin; echo __WC2__")
-        qemu.expect(r"262144", timeout=10)
-        qemu.expect(r"__WC2__", timeout=5)
-
-        # 5. Many small files in a directory
-        qemu.send_cmd("mkdir /tmp/fstest/many")
-        for i in range(5):
-            qemu.send_cmd(f"echo content_{i} > /tmp/fstest/many/f{i}.txt")
+        qemu.expect_literal("262144", timeout=10)
+        qemu.expect_literal("__WC2__", timeout=5)
+
+        # 5. Many small files in a directory. One command line for all of
+        #    them: fsh expands $vars at tokenize time, so a for loop can't
+        #    build the file names, but chaining with ';' costs one round-trip.
+        writes = "; ".join(
+            f"echo content_{i} > /tmp/fstest/many/f{i}.txt" for i in range(5)
+        )
+        qemu.send_cmd(f"mkdir /tmp/fstest/many; {writes}")
 
         # Verify count with ls | wc -l
         qemu.send_line("ls /tmp/fstest/many | wc -l; echo __WCL__")
-        qemu.expect(r"5", timeout=10)
-        qemu.expect(r"__WCL__", timeout=5)
+        qemu.expect_literal("5", timeout=10)
+        qemu.expect_literal("__WCL__", timeout=5)
 
         # 6. Verify one of them reads back correctly
         qemu.send_line("cat /tmp/fstest/many/f3.txt; echo __CAT2__")
-        qemu.expect(r"content_3", timeout=10)
-        qemu.expect(r"__CAT2__", timeout=5)
+        qemu.expect_literal("content_3", timeout=10)
+        qemu.expect_literal("__CAT2__", timeout=5)
 
         # 7. Rename test
         qemu.send_cmd("mv /tmp/fstest/small.txt /tmp/fstest/renamed.txt")
         qemu.send_line("cat /tmp/fstest/renamed.txt; echo __CAT3__")
-        qemu.expect(r"fs_hello_world", timeout=10)
-        qemu.expect(r"__CAT3__", timeout=5)
+        qemu.expect_literal("fs_hello_world", timeout=10)
+        qemu.expect_literal("__CAT3__", timeout=5)
 
         # 8. Truncate test
         qemu.send_cmd("truncate /tmp/fstest/medium.bin 1024")
         qemu.send_line("wc -c /tmp/fstest/medium.bin; echo __WC3__")
-        qemu.expect(r"\b1024\b", timeout=10)
-        qemu.expect(r"__WC3__", timeout=5)
+        qemu.expect(RE_1024, timeout=10)
+        qemu.expect_literal("__WC3__", timeout=5)
 
         # 9. Remove files
-        qemu.send_cmd("rm -f /tmp/fstest/renamed.txt")
-        qemu.send_cmd("rm -f /tmp/fstest/medium.bin")
-        qemu.send_cmd("rm -f /tmp/fstest/large.bin")
+        qemu.send_cmd("rm -f /tmp/fstest/renamed.txt /tmp/fstest/medium.bin /tmp/fstest/large.bin")
 
         log_pass("test_filesystem")
         return True
@@ -553,13 +736,61 @@ def test_shutdown(qemu):
 
 # ── Main ─────────────────────────────────────────────────────────────
 
+# Tests that only need a logged-in shell. Each group runs in order on one
+# QEMU instance; separate groups may run on separate instances.
+TEST_GROUPS = [
+    [test_basic_commands, test_time_subsystem],
+    [test_fay_install_xxd, test_filesystem],
+]
+
+
+def worker_count():
+    """Number of QEMU instances to run, from FORNAX_TEST_JOBS or CPU count.
+
+    Returns None if FORNAX_TEST_JOBS is set but not a positive integer.
+    """
+    raw = os.environ.get("FORNAX_TEST_JOBS", "")
+    if not raw:
+        jobs = os.cpu_count() or 1
+    else:
+        try:
+            jobs = int(raw)
+        except ValueError:
+            return None
+        if jobs <= 0:
+            return None
+    return min(jobs, len(TEST_GROUPS))
+
+
+def run_tests(qemu, tests):
+    """Boot qemu, log in, run tests, shut down. Stops at the first failure.
+
+    Returns {test name: passed} for the tests that ran.
+    """
+    qemu.start()
+    results = {}
+    for test in [test_boot_login, *tests, test_shutdown]:
+        results[test.__name__] = test(qemu)
+        if not results[test.__name__]:
+            break
+    return results
+
+
 def main():
     passed = 0
     failed = 0
-    qemu = None
+    qemus = []
 
     try:
-        # 1. Find OVMF
+        # 1. Check FORNAX_TEST_JOBS and find OVMF
+        jobs = worker_count()
+        if jobs is None:
+            print(f"{RED}Error: FORNAX_TEST_JOBS must be a positive integer, "
+                  f"got {os.environ['FORNAX_TEST_JOBS']!r}.{RESET}", file=sys.stderr)
+            print("Unset it to use the CPU count (at most one QEMU instance per test group).",
+                  file=sys.stderr)
+            return 1
+
         ovmf = find_ovmf()
         if not ovmf:
             print(f"{RED}Error: Could not find OVMF firmware.{RESET}", file=sys.stderr)
@@ -579,12 +810,14 @@ def main():
             print("Stop the process using port 8000 and try again.", file=sys.stderr)
             return 1
 
-        # 3. Build Fornax with POSIX + test packages
+        # 3. Build Fornax with POSIX + test packages. Only stderr is kept
+        #    (for the failure message); stdout is discarded unread.
         log("BUILD", "Building Fornax with POSIX + test packages...")
         result = subprocess.run(
             ["zig", "build", "x86_64", "-Dposix=true", "-Dtest-packages=true"],
             cwd=PROJECT_DIR,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
         )
         if result.returncode != 0:
@@ -597,7 +830,8 @@ def main():
         result = subprocess.run(
             ["zig", "build", "mkgpt", "mkfxfs"],
             cwd=PROJECT_DIR,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
         )
         if result.returncode != 0:
@@ -626,53 +860,45 @@ def main():
             http_server = start_http_server(pkg_dir, port=8000)
             log("HTTP", "Serving test packages on :8000")
 
-            # 8. Prepare rootfs and create test disk
+            # 8. Prepare rootfs, then one ESP + test disk per QEMU instance
             rootfs_dir = os.path.join(PROJECT_DIR, "zig-out", "rootfs")
             prepare_rootfs(rootfs_dir)
-            disk_img = create_test_disk(tmpdir, rootfs_dir)
-            log("DISK", "OK")
-
-            # 9. Start QEMU
             esp_dir = os.path.join(PROJECT_DIR, "zig-out", "esp")
-            qemu = QemuDriver(ovmf, esp_dir, disk_img)
-            log("QEMU", "Starting Fornax (headless)...")
-            qemu.start()
-
-            # 10. Run tests
-            if test_boot_login(qemu):
-                passed += 1
-            else:
-                failed += 1
-
-            if failed == 0:
-                if test_basic_commands(qemu):
-                    passed += 1
-                else:
-                    failed += 1
-
-            if failed == 0:
-                if test_time_subsystem(qemu):
-                    passed += 1
-                else:
-                    failed += 1
-
-            if failed == 0:
-                if test_fay_install_xxd(qemu):
-                    passed += 1
-                else:
-                    failed += 1
-
-            if failed == 0:
-                if test_filesystem(qemu):
-                    passed += 1
-                else:
-                    failed += 1
+            for i in range(jobs):
+                worker_dir = os.path.join(tmpdir, f"worker{i}")
+                os.makedirs(worker_dir)
+                worker_esp = esp_dir
+                if jobs > 1:
+                    # OVMF saves NvVars to the ESP and fat:rw writes back to
+                    # the host directory, so instances can't share one
+                    worker_esp = os.path.join(worker_dir, "esp")
+                    shutil.copytree(esp_dir, worker_esp)
+                disk_img = create_test_disk(worker_dir, rootfs_dir)
+                qemus.append(QemuDriver(ovmf, worker_esp, disk_img, echo=jobs == 1))
+            log("DISK", "OK")
 
-            if failed == 0:
-                if test_shutdown(qemu):
-                    passed += 1
-                else:
-                    failed += 1
+            # 9. Boot QEMU and run the test groups, spread across instances.
+            #    Each instance has its own slirp network, so all of them
+            #    reach the one HTTP server above as 10.0.2.2:8000.
+            groups = [[] for _ in range(jobs)]
+            for i, group in enumerate(TEST_GROUPS):
+                groups[i % jobs].extend(group)
+            log("QEMU", f"Starting {jobs} Fornax instance(s) (headless)...")
+            #    Boot and shutdown run on every instance but count once, so
+            #    the total doesn't depend on the number of instances.
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+            try:
+                outcomes = {}
+                for results in pool.map(run_tests, qemus, groups):
+                    for name, ok in results.items():
+                        outcomes[name] = outcomes.get(name, True) and ok
+                passed += sum(outcomes.values())
+                failed += len(outcomes) - sum(outcomes.values())
+            finally:
+                # On interrupt, killing QEMU unblocks the worker threads
+                for qemu in qemus:
+                    qemu.stop()
+                pool.shutdown()
 
             # Cleanup
             http_server.shutdown()
@@ -684,7 +910,7 @@ def main():
         print(f"{RED}Unexpected error: {e}{RESET}", file=sys.stderr)
         failed += 1
     finally:
-        if qemu:
+        for qemu in qemus:
             qemu.stop()
 
     # Summary
@@ -695,8 +921,11 @@ def main():
         return 0
     else:
         print(f"{RED}{BOLD}{failed}/{total} tests failed.{RESET}", file=sys.stderr)
-        if qemu and qemu.full_log:
-            log_path = os.path.join(PROJECT_DIR, "test-serial.log")
+        for i, qemu in enumerate(qemus):
+            if not qemu.full_log:
+                continue
+            name = "test-serial.log" if len(qemus) == 1 else f"test-serial-{i}.log"
+            log_path = os.path.join(PROJECT_DIR, name)
             with open(log_path, "wb") as f:
                 f.write(qemu.full_log)
             print(f"Full serial log saved to: {log_path}", file=sys.stderr)